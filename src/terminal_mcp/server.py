@@ -9,6 +9,18 @@ from .session_manager import SessionManager
 # Initialize the MCP server
 mcp = FastMCP("terminal_mcp")
 
+# Session manager, resolved on the first tool call rather than at import so
+# that a missing terminal emulator surfaces as a tool error, not a crash
+_MANAGER: Optional[SessionManager] = None
+
+
+def _manager() -> SessionManager:
+    """Get the session manager, creating it on first use."""
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = SessionManager.get_instance()
+    return _MANAGER
+
 
 @mcp.tool(
     name="terminal_create_or_get",
@@ -44,8 +56,7 @@ async def terminal_create_or_get(
         - Create named terminal: terminal_create_or_get(name="dev-server")
         - Get existing terminal: terminal_create_or_get(name="dev-server")
     """
-    manager = SessionManager.get_instance()
-    session = await manager.create_or_get_terminal(name, working_dir)
+    session = await _manager().create_or_get_terminal(name, working_dir)
     return {
         "session_id": session.id,
         "name": session.name,
@@ -86,8 +97,7 @@ async def terminal_send_input(session_id: str, text: str) -> dict:
         The command is executed asynchronously. Use terminal_get_output to
         retrieve the results after the command completes.
     """
-    manager = SessionManager.get_instance()
-    session = await manager.get_session(session_id)
+    session = await _manager().get_session(session_id)
 
     if not session:
         return {
@@ -96,7 +106,7 @@ async def terminal_send_input(session_id: str, text: str) -> dict:
             "suggestion": "Use terminal_create_or_get to create a new terminal.",
         }
 
-    success = await manager.send_input(session_id, text)
+    success = await _manager().send_input(session_id, text)
     if success:
         return {
             "success": True,
@@ -143,8 +153,7 @@ async def terminal_get_output(session_id: str, lines: int = 100) -> dict:
         Output may have a slight delay as it's captured asynchronously from
         the terminal process.
     """
-    manager = SessionManager.get_instance()
-    session = await manager.get_session(session_id)
+    session = await _manager().get_session(session_id)
 
     if not session:
         return {
@@ -156,7 +165,7 @@ async def terminal_get_output(session_id: str, lines: int = 100) -> dict:
     # Clamp lines to reasonable range
     lines = max(1, min(lines, 1000))
 
-    output = await manager.get_output(session_id, lines)
+    output = await _manager().get_output(session_id, lines)
     return {
         "success": True,
         "session_id": session_id,
@@ -185,19 +194,11 @@ async def terminal_list() -> dict:
     Returns:
         dict: Contains a list of terminal sessions with their details.
     """
-    manager = SessionManager.get_instance()
-    sessions = await manager.list_sessions()
+    sessions = await _manager().list_sessions()
 
     return {
         "count": len(sessions),
-        "terminals": [
-            {
-                "session_id": s.id,
-                "name": s.name,
-                "platform": s.platform,
-            }
-            for s in sessions
-        ],
+        "terminals": [s.to_summary_dict() for s in sessions],
     }
 
 
@@ -222,8 +223,7 @@ async def terminal_close(session_id: str) -> dict:
     Returns:
         dict: Contains success status and message.
     """
-    manager = SessionManager.get_instance()
-    success = await manager.close_session(session_id)
+    success = await _manager().close_session(session_id)
 
     if success:
         return {
@@ -4,11 +4,15 @@ import asyncio
 import atexit
 import signal
 import sys
+import threading
 from typing import Optional
 
 from .terminal import get_terminal_implementation
 from .terminal.base import BaseTerminal, TerminalSession
 
+# Guards singleton construction against concurrent first calls
+_INSTANCE_LOCK = threading.Lock()
+
 
 class SessionManager:
     """Terminal session manager - singleton pattern."""
@@ -17,8 +21,12 @@ class SessionManager:
 
     def __init__(self):
         self._sessions: dict[str, TerminalSession] = {}
+        self._by_name: dict[str, str] = {}  # name -> session ID
         self._terminal: BaseTerminal = get_terminal_implementation()
+        # The global lock serializes create-or-get by name; closing one
+        # existing session only takes that session's lock
         self._lock = asyncio.Lock()
+        self._session_locks: dict[str, asyncio.Lock] = {}
         self._cleanup_registered = False
         self._setup_cleanup_handlers()
 
@@ -26,7 +34,9 @@ class SessionManager:
     def get_instance(cls) -> "SessionManager":
         """Get the singleton instance."""
         if cls._instance is None:
-            cls._instance = cls()
+            with _INSTANCE_LOCK:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
 
     def _setup_cleanup_handlers(self):
@@ -67,27 +77,17 @@ class SessionManager:
 
     def _sync_cleanup(self):
         """Synchronous cleanup for atexit."""
-        # Call the terminal's cleanup method if available
+        # The terminal's cleanup method tears down all of its sessions
+        # synchronously, so no event loop needs to be spun up here
         if hasattr(self._terminal, "cleanup"):
-            self._terminal.cleanup()
-
-        # Also try async cleanup
-        try:
-            loop = asyncio.new_event_loop()
-            loop.run_until_complete(self.cleanup_all())
-            loop.close()
-        except Exception:
-            pass
-
-    async def cleanup_all(self):
-        """Clean up all terminal sessions."""
-        async with self._lock:
-            for session_id, session in list(self._sessions.items()):
-                try:
-                    await self._terminal.close_terminal(session)
-                except Exception:
-                    pass
-            self._sessions.clear()
+            try:
+                self._terminal.cleanup()
+            except Exception:
+                pass
+
+        self._sessions.clear()
+        self._by_name.clear()
+        self._session_locks.clear()
 
     async def create_or_get_terminal(
         self, name: Optional[str] = None, working_dir: Optional[str] = None
@@ -103,20 +103,17 @@ class SessionManager:
         """
         async with self._lock:
             # If name specified, try to find existing session
-            if name:
-                for session in self._sessions.values():
-                    if session.name == name:
-                        if await self._terminal.is_session_alive(session):
-                            return session
-                        else:
-                            # Clean up dead session
-                            await self._terminal.close_terminal(session)
-                            del self._sessions[session.id]
-                            break
+            if name and name in self._by_name:
+                session = self._sessions[self._by_name[name]]
+                if await self._terminal.is_session_alive(session):
+                    return session
+                else:
+                    # Clean up dead session
+                    await self._close_session(session)
 
             # Create new terminal
             session = await self._terminal.create_terminal(name, working_dir)
-            self._sessions[session.id] = session
+            self._add_session(session)
             return session
 
     async def get_session(self, session_id: str) -> Optional[TerminalSession]:
@@ -128,15 +125,14 @@ class SessionManager:
         Returns:
             TerminalSession if found and alive, None otherwise.
         """
+        # Plain dict reads need no lock; only removal of a dead session does
         session = self._sessions.get(session_id)
         if session:
             if await self._terminal.is_session_alive(session):
                 return session
             else:
                 # Clean up dead session
-                async with self._lock:
-                    await self._terminal.close_terminal(session)
-                    del self._sessions[session_id]
+                await self._close_session(session)
         return None
 
     async def send_input(self, session_id: str, text: str) -> bool:
@@ -152,6 +148,8 @@ class SessionManager:
         session = await self.get_session(session_id)
         if not session:
             return False
+        # No session lock here: a send can wait on the agent, and must not
+        # hold up get_output or close_session (closing fails pending sends)
         return await self._terminal.send_input(session, text)
 
     async def get_output(self, session_id: str, lines: int = 100) -> str:
@@ -175,22 +173,59 @@ class SessionManager:
         Returns:
             List of active TerminalSession objects.
         """
-        async with self._lock:
-            active_sessions = []
-            dead_sessions = []
+        # Check liveness concurrently on a snapshot so slow checks neither
+        # add up nor hold any lock
+        sessions = list(self._sessions.values())
+        alive_flags = await asyncio.gather(
+            *(self._terminal.is_session_alive(session) for session in sessions)
+        )
+
+        active_sessions = []
+        dead_sessions = []
+
+        for session, alive in zip(sessions, alive_flags):
+            if alive:
+                active_sessions.append(session)
+            else:
+                dead_sessions.append(session)
 
-            for session in self._sessions.values():
-                if await self._terminal.is_session_alive(session):
-                    active_sessions.append(session)
-                else:
-                    dead_sessions.append(session)
+        # Clean up dead sessions
+        for session in dead_sessions:
+            await self._close_session(session)
+
+        return active_sessions
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        """Get the lock guarding operations on one session."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
 
-            # Clean up dead sessions
-            for session in dead_sessions:
-                await self._terminal.close_terminal(session)
-                del self._sessions[session.id]
+    async def _close_session(self, session: TerminalSession) -> bool:
+        """Close and forget a session under its own lock.
 
-            return active_sessions
+        Returns:
+            True if closed, False if a concurrent caller already removed it.
+        """
+        async with self._session_lock(session.id):
+            if self._sessions.get(session.id) is not session:
+                return False
+            await self._terminal.close_terminal(session)
+            self._remove_session(session)
+            return True
+
+    def _add_session(self, session: TerminalSession):
+        """Register a session and index it by name."""
+        self._sessions[session.id] = session
+        self._by_name[session.name] = session.id
+
+    def _remove_session(self, session: TerminalSession):
+        """Unregister a session and drop its name index entry."""
+        del self._sessions[session.id]
+        self._session_locks.pop(session.id, None)
+        if self._by_name.get(session.name) == session.id:
+            del self._by_name[session.name]
 
     async def close_session(self, session_id: str) -> bool:
         """Close a specific terminal session.
@@ -201,11 +236,7 @@ class SessionManager:
         Returns:
             True if successful, False if session not found.
         """
-        async with self._lock:
-            session = self._sessions.get(session_id)
-            if not session:
-                return False
-
-            await self._terminal.close_terminal(session)
-            del self._sessions[session_id]
-            return True
+        session = self._sessions.get(session_id)
+        if not session:
+            return False
+        return await self._close_session(session)
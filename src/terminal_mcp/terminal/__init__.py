@@ -1,5 +1,6 @@
 """Terminal implementations for different platforms."""
 
+import functools
 import sys
 from typing import TYPE_CHECKING
 
@@ -7,6 +8,7 @@ if TYPE_CHECKING:
     from .base import BaseTerminal
 
 
+@functools.lru_cache(maxsize=1)
 def is_wsl() -> bool:
     """Check if running inside WSL."""
     if sys.platform != "linux":
@@ -18,9 +20,13 @@ def is_wsl() -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=1)
 def get_terminal_implementation() -> "BaseTerminal":
     """Get the appropriate terminal implementation for the current platform.
 
+    The platform can't change while the process runs, so detection happens
+    once and every call returns the same instance.
+
     Returns:
         BaseTerminal implementation for the current platform.
 
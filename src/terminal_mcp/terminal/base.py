@@ -3,15 +3,32 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Optional
+import itertools
+import os
+import pathlib
 import time
-import uuid
+
+# Directory containing src/, under which session files are kept in tmp/
+PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parents[3])
+
+# Session IDs only need to be unique, not unpredictable: a per-process random
+# prefix plus a counter avoids drawing a fresh UUID for every session. The
+# prefix is 32 bits so that servers sharing the tmp folder, including ones
+# restarted over old files, practically never pick the same one
+_SESSION_PREFIX = os.urandom(4).hex()
+_SESSION_COUNTER = itertools.count(1)
+
+
+def next_session_id() -> str:
+    """Return a new 12-character session ID."""
+    return f"{_SESSION_PREFIX}{next(_SESSION_COUNTER):04x}"
 
 
 @dataclass
 class TerminalSession:
     """Terminal session data class."""
 
-    id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=next_session_id)
     name: str = ""
     platform: str = ""
     pid: Optional[int] = None
@@ -20,10 +37,17 @@ class TerminalSession:
     created_at: float = field(default_factory=time.time)
     is_alive: bool = True
 
+    def to_summary_dict(self) -> dict:
+        """Return the fields reported when listing terminals."""
+        return {"session_id": self.id, "name": self.name, "platform": self.platform}
+
 
 class BaseTerminal(ABC):
     """Abstract base class for terminal implementations."""
 
+    # Directory holding the session files; set by each implementation
+    _temp_dir: str
+
     @abstractmethod
     async def create_terminal(
         self, name: Optional[str] = None, working_dir: Optional[str] = None
@@ -88,3 +112,30 @@ class BaseTerminal(ABC):
             True if successful, False otherwise.
         """
         pass
+
+    def _purge_session_files(self, *session_ids: str):
+        """Remove every temp file belonging to the given sessions.
+
+        Session files are all named "<session id>_..." inside the
+        implementation's ``_temp_dir``, so a single directory scan finds
+        them without checking each path first.
+
+        Args:
+            session_ids: IDs of the sessions whose files to remove.
+        """
+        prefixes = tuple(f"{session_id}_" for session_id in session_ids)
+        if not prefixes:
+            return
+
+        try:
+            entries = list(os.scandir(self._temp_dir))
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.name.startswith(prefixes):
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    # Already gone, or still held open by the terminal
+                    pass
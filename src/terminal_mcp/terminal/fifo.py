@@ -0,0 +1,175 @@
+"""Non-blocking writer for the named pipes that feed Unix terminal agents."""
+
+import asyncio
+import os
+from collections import deque
+from typing import Optional
+
+
+class FifoWriter:
+    """Keeps a named pipe open for writing and sends to it without threads.
+
+    Writes are collected in a backlog and flushed from an event loop
+    callback, so everything sent during one loop iteration (e.g. a burst
+    of commands) goes out in a single write. Whatever the pipe can't take
+    yet is flushed once the agent has read enough to make space.
+
+    The backlog is bounded and writers wait a limited time, so an agent
+    that stops reading (e.g. busy with a long command) makes sends fail
+    instead of hanging. A write that times out before any of it went out
+    is taken back, so a failed send is never delivered later.
+    """
+
+    # Most bytes kept waiting for the agent, about one pipe buffer's worth
+    MAX_BACKLOG = 64 * 1024
+
+    # Seconds a write waits for the agent to take its data
+    WRITE_TIMEOUT = 5.0
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fd: Optional[int] = None
+        self._ever_opened = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._backlog = bytearray()
+        # Pending flush callback, and whether we wait for the pipe to drain
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._watching = False
+        # Byte counters used to tell waiters when their data has gone out
+        self._queued = 0
+        self._written = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    def open(self) -> bool:
+        """Open the pipe if not already open.
+
+        Returns:
+            True if open, False if no agent is reading the pipe (yet).
+        """
+        if self._fd is None:
+            try:
+                self._fd = os.open(self._path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                return False
+            self._ever_opened = True
+        return True
+
+    @property
+    def ever_opened(self) -> bool:
+        """Whether an agent has ever been found reading the pipe."""
+        return self._ever_opened
+
+    async def write(self, data: bytes) -> bool:
+        """Send data to the pipe.
+
+        Returns:
+            True once all of it has been written, or if part of it was
+            written within WRITE_TIMEOUT (the rest follows when the agent
+            reads again). False if none of it was sent: the pipe is gone,
+            the backlog is full, or the agent took none of it in time.
+        """
+        if not self.open():
+            return False
+        if self._backlog and len(self._backlog) + len(data) > self.MAX_BACKLOG:
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        if not self._backlog:
+            self._flush_handle = self._loop.call_soon(self._flush)
+
+        self._backlog += data
+        self._queued += len(data)
+        done = self._loop.create_future()
+        self._waiters.append((self._queued, done))
+        try:
+            # Shielded so that on timeout the waiter is still pending and
+            # can be told apart from one resolved meanwhile
+            return await asyncio.wait_for(asyncio.shield(done), self.WRITE_TIMEOUT)
+        except asyncio.TimeoutError:
+            if done.done():
+                return done.result()
+            return self._withdraw(done, len(data))
+
+    def _withdraw(self, done: asyncio.Future, size: int) -> bool:
+        """Take a timed-out write back out of the backlog if none of it is out.
+
+        Returns:
+            False if the write was removed, True if part of it was already
+            written (the rest stays queued so the agent gets a whole line).
+        """
+        index = next(i for i, (_, fut) in enumerate(self._waiters) if fut is done)
+        target = self._waiters[index][0]
+        start = target - size
+        if start < self._written:
+            return True
+
+        offset = start - self._written
+        del self._backlog[offset : offset + size]
+        self._queued -= size
+        del self._waiters[index]
+        # Later writes now end that much earlier in the stream
+        for i in range(index, len(self._waiters)):
+            later_target, fut = self._waiters[i]
+            self._waiters[i] = (later_target - size, fut)
+
+        if not self._backlog:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if self._watching:
+                self._loop.remove_writer(self._fd)
+                self._watching = False
+        done.set_result(False)
+        return False
+
+    def _flush(self):
+        """Write as much of the backlog as the pipe accepts."""
+        self._flush_handle = None
+        try:
+            written = os.write(self._fd, self._backlog)
+        except BlockingIOError:
+            written = 0
+        except OSError:
+            # The reader went away; reopen on the next write
+            self.close()
+            return
+
+        del self._backlog[:written]
+        self._written += written
+        while self._waiters and self._waiters[0][0] <= self._written:
+            _, done = self._waiters.popleft()
+            if not done.done():
+                done.set_result(True)
+
+        # Wait for the agent to make room for the rest
+        if self._backlog and not self._watching:
+            self._loop.add_writer(self._fd, self._flush)
+            self._watching = True
+        elif not self._backlog and self._watching:
+            self._loop.remove_writer(self._fd)
+            self._watching = False
+
+    def close(self):
+        """Close the pipe, failing any writes still in the backlog."""
+        if self._fd is None:
+            return
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._watching and not self._loop.is_closed():
+            self._loop.remove_writer(self._fd)
+        self._watching = False
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+        self._fd = None
+
+        # Dropped bytes count as done so later writes can complete
+        self._backlog.clear()
+        self._written = self._queued
+        while self._waiters:
+            _, done = self._waiters.popleft()
+            if not done.done():
+                done.set_result(False)
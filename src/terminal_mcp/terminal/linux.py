@@ -2,14 +2,26 @@
 
 import asyncio
 import os
+import shlex
 import signal
 import shutil
-import uuid
+import string
+import time
 from typing import Optional
 
-from .base import BaseTerminal, TerminalSession
+from .base import PROJECT_ROOT, BaseTerminal, TerminalSession, next_session_id
+from .fifo import FifoWriter
+from .output import OutputRing
 
-from .base import BaseTerminal, TerminalSession
+# Use tmp folder under the project directory for easier management
+_TMP_DIR = os.path.join(PROJECT_ROOT, "tmp")
+os.makedirs(_TMP_DIR, exist_ok=True)
+
+
+class _AgentTemplate(string.Template):
+    """Template with @name placeholders so bash's own $ syntax passes through."""
+
+    delimiter = "@"
 
 
 class LinuxTerminal(BaseTerminal):
@@ -19,82 +31,49 @@ class LinuxTerminal(BaseTerminal):
     TERMINAL_EMULATORS = [
         ("gnome-terminal", ["gnome-terminal", "--", "bash", "-c"]),
         ("konsole", ["konsole", "-e", "bash", "-c"]),
-        ("xfce4-terminal", ["xfce4-terminal", "-e"]),
-        ("mate-terminal", ["mate-terminal", "-e"]),
+        ("xfce4-terminal", ["xfce4-terminal", "-x", "bash", "-c"]),
+        ("mate-terminal", ["mate-terminal", "-x", "bash", "-c"]),
         ("lxterminal", ["lxterminal", "-e"]),
         ("xterm", ["xterm", "-hold", "-e", "bash", "-c"]),
         ("x-terminal-emulator", ["x-terminal-emulator", "-e", "bash", "-c"]),
     ]
 
-    def __init__(self):
-        # Use tmp folder under the project directory for easier management
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        self._temp_dir = os.path.join(project_root, "tmp")
-        os.makedirs(self._temp_dir, exist_ok=True)
-        self._sessions: dict[str, TerminalSession] = {}
-        self._terminal_cmd = self._detect_terminal()
-
-    def _detect_terminal(self) -> list[str]:
-        """Detect available terminal emulator."""
-        for name, cmd in self.TERMINAL_EMULATORS:
-            if shutil.which(name):
-                return cmd
-        raise RuntimeError(
-            "No supported terminal emulator found. "
-            "Please install one of: gnome-terminal, konsole, xfce4-terminal, "
-            "mate-terminal, lxterminal, xterm"
-        )
-
-    async def create_terminal(
-        self, name: Optional[str] = None, working_dir: Optional[str] = None
-    ) -> TerminalSession:
-        """Create a new terminal window."""
-        session_id = str(uuid.uuid4())[:8]
-        terminal_name = name or f"Terminal-{session_id}"
-
-        # Create named pipe and output file
-        input_pipe = os.path.join(self._temp_dir, f"{session_id}_input.fifo")
-        output_file = os.path.join(self._temp_dir, f"{session_id}_output.log")
-        pid_file = os.path.join(self._temp_dir, f"{session_id}.pid")
-
-        os.mkfifo(input_pipe)
-        open(output_file, "w").close()
-
-        # Working directory setup
-        cwd = working_dir if working_dir else os.getcwd()
-
-        # Agent script with both FIFO monitoring and interactive input
-        # Cleans up all temp files on exit (regardless of how terminal is closed)
-        agent_script = f"""
-cd '{cwd}'
-exec > >(tee -a '{output_file}') 2>&1
-echo $$ > '{pid_file}'
-echo "Terminal MCP Agent Started (Session: {session_id})"
+    # Agent script with both FIFO monitoring and interactive input
+    # Cleans up all temp files on exit (regardless of how terminal is closed)
+    # Placeholders are substituted with shell-quoted values per session
+    # The PID is reported first so create_terminal can return before the
+    # rest of the agent (cd, tee) has finished starting up
+    _AGENT_TEMPLATE = _AgentTemplate("""
+echo $$ > @pid_file
+cd @cwd
+exec > >(tee @output_pipe) 2>&1
+echo "Terminal MCP Agent Started (Session: @session_id)"
 echo "Working directory: $(pwd)"
 echo "You can type commands directly or they will be received via MCP."
 echo ""
 
 # Background process to read from FIFO (for MCP commands)
+# Drains every queued line until the writer closes the pipe
 (
     while true; do
-        if read -r cmd < '{input_pipe}'; then
+        while read -r -u 3 cmd; do
             if [ -n "$cmd" ]; then
                 echo "$ $cmd"
-                eval "$cmd"
+                eval "$cmd" 3<&-
             fi
-        fi
+        done 3< @input_pipe
     done
 ) &
 FIFO_PID=$!
 
 # Cleanup function - removes all temp files when terminal exits
-cleanup() {{
+cleanup() {
     kill $FIFO_PID 2>/dev/null
-    rm -f '{input_pipe}' 2>/dev/null
-    rm -f '{output_file}' 2>/dev/null
-    rm -f '{pid_file}' 2>/dev/null
+    rm -f @input_pipe 2>/dev/null
+    rm -f @output_pipe 2>/dev/null
+    rm -f @pid_file 2>/dev/null
     exit 0
-}}
+}
 trap cleanup EXIT INT TERM
 
 # Interactive prompt for direct user input
@@ -105,14 +84,65 @@ while true; do
         eval "$user_cmd"
     fi
 done
-"""
+""")
 
-        # Build command based on terminal emulator
-        # For xfce4-terminal, the -e option takes the whole command as one arg
-        if "xfce4-terminal" in self._terminal_cmd[0]:
-            cmd = self._terminal_cmd + [f'bash -c "{agent_script}"']
-        else:
-            cmd = self._terminal_cmd + [agent_script]
+    # Output is kept in memory (see OutputRing), read from the agent's
+    # output pipe in blocks of this many bytes
+    OUTPUT_READ_SIZE = 64 * 1024
+
+    # Backoff schedule (seconds) while waiting for a new agent to come up
+    STARTUP_POLL_DELAYS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3)
+
+    # Seconds a liveness check result is reused before probing again
+    ALIVE_CACHE_TTL = 0.2
+
+    def __init__(self):
+        self._temp_dir = _TMP_DIR
+        self._sessions: dict[str, TerminalSession] = {}
+        self._alive_cache: dict[str, tuple[float, bool]] = {}
+        self._terminal_cmd = self._detect_terminal()
+
+    def _detect_terminal(self) -> list[str]:
+        """Detect available terminal emulator."""
+        for name, cmd in self.TERMINAL_EMULATORS:
+            if shutil.which(name):
+                return cmd
+        raise RuntimeError(
+            "No supported terminal emulator found. "
+            "Please install one of: gnome-terminal, konsole, xfce4-terminal, "
+            "mate-terminal, lxterminal, xterm"
+        )
+
+    async def create_terminal(
+        self, name: Optional[str] = None, working_dir: Optional[str] = None
+    ) -> TerminalSession:
+        """Create a new terminal window."""
+        session_id = next_session_id()
+        terminal_name = name or f"Terminal-{session_id}"
+
+        # Create named pipes for input and output
+        input_pipe = os.path.join(self._temp_dir, f"{session_id}_input.fifo")
+        output_pipe = os.path.join(self._temp_dir, f"{session_id}_output.fifo")
+        pid_file = os.path.join(self._temp_dir, f"{session_id}_agent.pid")
+
+        # Only the owner may read commands or output
+        os.mkfifo(input_pipe, 0o600)
+        os.mkfifo(output_pipe, 0o600)
+
+        # Open our read end first so the agent's tee doesn't block opening it
+        output_fd = os.open(output_pipe, os.O_RDONLY | os.O_NONBLOCK)
+
+        # Working directory setup
+        cwd = working_dir if working_dir else os.getcwd()
+
+        agent_script = self._AGENT_TEMPLATE.substitute(
+            cwd=shlex.quote(cwd),
+            output_pipe=shlex.quote(output_pipe),
+            input_pipe=shlex.quote(input_pipe),
+            pid_file=shlex.quote(pid_file),
+            session_id=session_id,
+        )
+        cmd = self._terminal_cmd + [agent_script]
 
         # Start the terminal process
         proc = await asyncio.create_subprocess_exec(
@@ -122,17 +152,15 @@ done
             start_new_session=True,
         )
 
-        # Wait a bit for the agent to start and write PID
-        await asyncio.sleep(0.5)
-
-        # Read the agent's PID
+        # Wait for the agent to write its PID and start reading the pipe,
+        # polling with backoff so a fast start isn't held up by a fixed sleep
         agent_pid = None
-        try:
-            if os.path.exists(pid_file):
-                with open(pid_file, "r") as f:
-                    agent_pid = int(f.read().strip())
-        except (ValueError, FileNotFoundError):
-            pass
+        writer = FifoWriter(input_pipe)
+        for delay in (0,) + self.STARTUP_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            agent_pid = agent_pid or self._read_pid(pid_file)
+            if writer.open() and agent_pid:
+                break
 
         session = TerminalSession(
             id=session_id,
@@ -140,54 +168,108 @@ done
             platform="linux",
             pid=agent_pid or proc.pid,
             input_pipe=input_pipe,
-            output_file=output_file,
+            output_file=output_pipe,
         )
-        session._pid_file = pid_file  # type: ignore
+        session._fifo_writer = writer  # type: ignore
+        session._output_fd = output_fd  # type: ignore
+        session._output_ring = OutputRing()  # type: ignore
+        asyncio.get_running_loop().add_reader(output_fd, self._read_output, session)
         self._sessions[session_id] = session
         return session
 
+    def _read_pid(self, pid_file: str) -> Optional[int]:
+        """Read the agent's PID, or None if it hasn't been written yet."""
+        try:
+            with open(pid_file, "r") as f:
+                return int(f.read().strip())
+        except (ValueError, FileNotFoundError):
+            return None
+
     async def send_input(self, session: TerminalSession, text: str) -> bool:
         """Send input via named pipe."""
-        if not session.input_pipe or not os.path.exists(session.input_pipe):
+        # Inputs sent together are coalesced by the writer into a single
+        # pipe write, and a full pipe never blocks the event loop
+        writer = getattr(session, "_fifo_writer", None)
+        if writer is None:
             return False
+        return await writer.write((text + "\n").encode())
 
+    def _read_output(self, session: TerminalSession):
+        """Move newly available output from the pipe into the session's ring."""
+        fd = session._output_fd  # type: ignore
         try:
-            # Open pipe in non-blocking mode
-            fd = os.open(session.input_pipe, os.O_WRONLY | os.O_NONBLOCK)
-            try:
-                os.write(fd, (text + "\n").encode())
-            finally:
-                os.close(fd)
-            return True
-        except (OSError, BrokenPipeError):
-            return False
+            data = os.read(fd, self.OUTPUT_READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        if data:
+            session._output_ring.feed(data)  # type: ignore
+        else:
+            # Every writer is gone, so the agent has exited
+            self._close_output_fd(session)
+
+    def _close_output_fd(self, session: TerminalSession):
+        """Stop watching the output pipe and close our end of it."""
+        fd = getattr(session, "_output_fd", None)
+        if fd is None:
+            return
+        session._output_fd = None  # type: ignore
+        try:
+            asyncio.get_running_loop().remove_reader(fd)
+        except RuntimeError:
+            # No running loop (e.g. during interpreter shutdown)
+            pass
+        try:
+            os.close(fd)
+        except OSError:
+            pass
 
     async def get_output(self, session: TerminalSession, lines: int = 100) -> str:
-        """Read output from the output file."""
-        if not session.output_file or not os.path.exists(session.output_file):
-            return ""
-
-        try:
-            with open(session.output_file, "r") as f:
-                all_lines = f.readlines()
-                return "".join(all_lines[-lines:])
-        except (FileNotFoundError, PermissionError):
+        """Return the last lines of buffered output."""
+        ring = getattr(session, "_output_ring", None)
+        if ring is None:
             return ""
+        return ring.tail(lines)
 
     async def is_session_alive(self, session: TerminalSession) -> bool:
         """Check if the terminal process is still running."""
         if not session.pid:
             return False
 
+        # Bursts of tool calls all check liveness; reuse a recent answer
+        now = time.monotonic()
+        cached = self._alive_cache.get(session.id)
+        if cached and now - cached[0] < self.ALIVE_CACHE_TTL:
+            return cached[1]
+
         try:
             # Check if process exists
             os.kill(session.pid, 0)
-            return True
+            alive = True
         except (OSError, ProcessLookupError):
-            return False
+            alive = False
+
+        self._alive_cache[session.id] = (now, alive)
+        return alive
 
     async def close_terminal(self, session: TerminalSession) -> bool:
         """Close the terminal."""
+        return self._close_terminal_sync(session)
+
+    def _close_terminal_sync(self, session: TerminalSession) -> bool:
+        """Kill the agent, release the session's resources and remove its files.
+
+        Everything here is a plain syscall, so it is safe to call without an
+        event loop (e.g. from atexit or a signal handler).
+        """
+        self._release_session(session)
+        self._purge_session_files(session.id)
+        return True
+
+    def _release_session(self, session: TerminalSession):
+        """Kill the agent and close everything the session holds open."""
         if session.pid:
             try:
                 # Send SIGTERM to the process group
@@ -201,34 +283,20 @@ done
             except (OSError, ProcessLookupError):
                 pass
 
-        # Clean up temp files
-        try:
-            if session.input_pipe and os.path.exists(session.input_pipe):
-                os.remove(session.input_pipe)
-            if session.output_file and os.path.exists(session.output_file):
-                os.remove(session.output_file)
-            pid_file = getattr(session, "_pid_file", None)
-            if pid_file and os.path.exists(pid_file):
-                os.remove(pid_file)
-        except (OSError, PermissionError):
-            pass
+        writer = getattr(session, "_fifo_writer", None)
+        if writer is not None:
+            writer.close()
+        self._close_output_fd(session)
+        self._alive_cache.pop(session.id, None)
 
         # Remove from sessions
-        if session.id in self._sessions:
-            del self._sessions[session.id]
-
-        return True
+        self._sessions.pop(session.id, None)
 
     def cleanup(self):
         """Clean up all sessions and temp files."""
+        session_ids = list(self._sessions)
         for session in list(self._sessions.values()):
-            if session.pid:
-                try:
-                    os.killpg(os.getpgid(session.pid), signal.SIGTERM)
-                except (OSError, ProcessLookupError):
-                    pass
-                try:
-                    os.kill(session.pid, signal.SIGTERM)
-                except (OSError, ProcessLookupError):
-                    pass
+            self._release_session(session)
+        # Remove every session's files in one pass over the tmp folder
+        self._purge_session_files(*session_ids)
         # Note: We don't delete the tmp directory itself since it's a fixed location
@@ -1,28 +1,64 @@
 """macOS Terminal.app implementation."""
 
 import asyncio
+import errno
 import os
-import uuid
+import re
+import shlex
+import time
 from typing import Optional
 
-from .base import BaseTerminal, TerminalSession
+from .base import PROJECT_ROOT, BaseTerminal, TerminalSession, next_session_id
+from .fifo import FifoWriter
+from .output import LogTail
+
+# Use tmp folder under the project directory for easier management
+_TMP_DIR = os.path.join(PROJECT_ROOT, "tmp")
+os.makedirs(_TMP_DIR, exist_ok=True)
+
+# A double-quoted string in AppleScript source form, as printed by
+# "osascript -ss"
+_APPLESCRIPT_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+def _applescript_string(text: str) -> str:
+    """Quote text as a single-line AppleScript string literal."""
+    for char, escaped in (("\\", "\\\\"), ('"', '\\"'), ("\n", "\\n"), ("\r", "\\r")):
+        text = text.replace(char, escaped)
+    return f'"{text}"'
+
+
+def _parse_string_list(result: str) -> set[str]:
+    """Extract the strings from an AppleScript list in source form."""
+    escapes = {"n": "\n", "r": "\r", "t": "\t"}
+    return {
+        re.sub(r"\\(.)", lambda m: escapes.get(m[1], m[1]), item)
+        for item in _APPLESCRIPT_STRING.findall(result)
+    }
 
 
 class MacOSTerminal(BaseTerminal):
     """macOS Terminal.app implementation using AppleScript."""
 
+    # Backoff schedule (seconds) while waiting for the agent to start reading
+    # its input pipe; Terminal.app can take a few seconds to launch
+    STARTUP_POLL_DELAYS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 1.6)
+
+    # How long (seconds) one listing of Terminal.app window titles is reused
+    # for liveness checks
+    ALIVE_CACHE_TTL = 1.0
+
     def __init__(self):
-        # Use tmp folder under the project directory for easier management
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        self._temp_dir = os.path.join(project_root, "tmp")
-        os.makedirs(self._temp_dir, exist_ok=True)
+        self._temp_dir = _TMP_DIR
         self._sessions: dict[str, TerminalSession] = {}
+        # (monotonic time fetched, custom titles of open Terminal.app windows)
+        self._alive_cache: tuple[float, set[str]] = (0.0, set())
 
     async def create_terminal(
         self, name: Optional[str] = None, working_dir: Optional[str] = None
     ) -> TerminalSession:
         """Create a new Terminal.app window."""
-        session_id = str(uuid.uuid4())[:8]
+        session_id = next_session_id()
         terminal_name = name or f"Terminal-{session_id}"
 
         # Create output file, input FIFO, and agent script file
@@ -30,11 +66,11 @@ class MacOSTerminal(BaseTerminal):
         input_pipe = os.path.join(self._temp_dir, f"{session_id}_input.fifo")
         script_file = os.path.join(self._temp_dir, f"{session_id}_agent.sh")
 
-        # Create named pipe
-        os.mkfifo(input_pipe)
+        # Create named pipe (owner-only, like the output file below)
+        os.mkfifo(input_pipe, 0o600)
 
-        # Create empty output file
-        open(output_file, "w").close()
+        # Create empty output file; it may hold sensitive command output
+        os.close(os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600))
 
         # Build the agent script that will run in the terminal
         working_dir_cmd = ""
@@ -54,14 +90,15 @@ echo "You can type commands directly or they will be received via MCP."
 echo ""
 
 # Background process to read from FIFO (for MCP commands)
+# Drains every queued line until the writer closes the pipe
 (
     while true; do
-        if read -r cmd < '{input_pipe}'; then
+        while read -r -u 3 cmd; do
             if [ -n "$cmd" ]; then
                 echo "$ $cmd"
-                eval "$cmd"
+                eval "$cmd" 3<&-
             fi
-        fi
+        done 3< '{input_pipe}'
     done
 ) &
 FIFO_PID=$!
@@ -90,23 +127,22 @@ done
             f.write(agent_script)
         os.chmod(script_file, 0o755)
 
-        # AppleScript to open terminal and run the script file
-        applescript = f'''
-tell application "Terminal"
-    activate
-    do script "{script_file}"
-    set custom title of front window to "{terminal_name}"
-end tell
-'''
-
-        proc = await asyncio.create_subprocess_exec(
-            "osascript",
-            "-e",
-            applescript,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        # Open terminal and run the script file
+        await self._osa_eval(
+            'tell application "Terminal" to activate',
+            'tell application "Terminal" to do script '
+            + _applescript_string(shlex.quote(script_file)),
+            'tell application "Terminal" to set custom title of front window to '
+            + _applescript_string(terminal_name),
         )
-        await proc.wait()
+
+        # Wait for the agent to open its end of the input pipe, so the
+        # first send doesn't find nobody reading
+        writer = FifoWriter(input_pipe)
+        for delay in self.STARTUP_POLL_DELAYS:
+            if writer.open():
+                break
+            await asyncio.sleep(delay)
 
         session = TerminalSession(
             id=session_id,
@@ -115,119 +151,149 @@ end tell
             input_pipe=input_pipe,
             output_file=output_file,
         )
+        session._fifo_writer = writer  # type: ignore
+        session._output_tail = LogTail(output_file)  # type: ignore
         self._sessions[session_id] = session
+        # The cached window titles predate this window
+        self._alive_cache = (0.0, set())
         return session
 
     async def send_input(self, session: TerminalSession, text: str) -> bool:
         """Send input to the terminal via named pipe."""
-        if not session.input_pipe or not os.path.exists(session.input_pipe):
-            return False
-
-        try:
-            # Write to pipe in a separate thread to avoid blocking the event loop
-            def write_to_pipe():
-                try:
-                    with open(session.input_pipe, 'w') as pipe:
-                        pipe.write(text + "\n")
-                        pipe.flush()
-                    return True
-                except (OSError, BrokenPipeError, IOError):
-                    return False
-
-            # Run the blocking operation in a thread pool
-            result = await asyncio.to_thread(write_to_pipe)
-            return result
-        except Exception:
+        # The writer keeps the pipe open and never blocks the event loop,
+        # so no thread hop or per-command open is needed
+        writer = getattr(session, "_fifo_writer", None)
+        if writer is None:
             return False
+        return await writer.write((text + "\n").encode())
 
     async def get_output(self, session: TerminalSession, lines: int = 100) -> str:
         """Read output from the output file."""
-        if not session.output_file or not os.path.exists(session.output_file):
+        # Only bytes appended since the previous call are read
+        tail = getattr(session, "_output_tail", None)
+        if tail is None:
             return ""
 
         try:
-            with open(session.output_file, "r") as f:
-                all_lines = f.readlines()
-                return "".join(all_lines[-lines:])
+            return tail.read(lines)
         except (FileNotFoundError, PermissionError):
             return ""
 
     async def is_session_alive(self, session: TerminalSession) -> bool:
         """Check if the terminal window is still open."""
-        # Check if the named pipe still exists
-        if not session.input_pipe or not os.path.exists(session.input_pipe):
+        if not session.input_pipe:
             return False
 
-        # Try to check if Terminal.app has the window
-        applescript = f'''
-tell application "Terminal"
-    set windowCount to count of (every window whose custom title is "{session.name}")
-    return windowCount
-end tell
-'''
+        # The agent keeps its input pipe open for reading while it runs, so
+        # a non-blocking open for writing answers without asking Terminal.app
+        try:
+            fd = os.open(session.input_pipe, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            # ENOENT: the agent removed the pipe on exit
+            if e.errno == errno.ENOENT:
+                return False
+            # ENXIO: nobody reads the pipe. That means the agent is gone only
+            # if it was ever reading; a slow Terminal.app launch may not have
+            # started it yet, so ask Terminal.app in that case
+            writer = getattr(session, "_fifo_writer", None)
+            if e.errno == errno.ENXIO and writer is not None and writer.ever_opened:
+                return False
+        else:
+            os.close(fd)
+            return True
+
+        # Otherwise check if Terminal.app has the window; one listing of all
+        # window titles answers every session polled within the TTL
+        fetched_at, titles = self._alive_cache
+        if time.monotonic() - fetched_at >= self.ALIVE_CACHE_TTL:
+            titles = await self._get_window_titles()
+            if titles is None:
+                return os.path.exists(session.input_pipe)
+            self._alive_cache = (time.monotonic(), titles)
+
+        return session.name in titles
+
+    async def _get_window_titles(self) -> Optional[set[str]]:
+        """Get the custom titles of all open Terminal.app windows.
+
+        Returns:
+            The set of titles, or None if Terminal.app couldn't be queried.
+        """
+        # The list comes back in source form, so titles containing commas
+        # or quotes are still split correctly
+        result = await self._osa_eval(
+            'tell application "Terminal" to get custom title of every window'
+        )
+        if result is None:
+            return None
+        return _parse_string_list(result)
+
+    async def _osa_eval(self, *statements: str) -> Optional[str]:
+        """Run AppleScript statements and return the result of the last one.
+
+        Args:
+            *statements: AppleScript statements, each passed with its own -e.
+
+        Returns:
+            The last result in AppleScript source form, or None on failure.
+        """
+        # -ss: results in source form, so strings come back quoted
+        args = ["osascript", "-ss"]
+        for statement in statements:
+            args += ["-e", statement]
         try:
             proc = await asyncio.create_subprocess_exec(
-                "osascript",
-                "-e",
-                applescript,
+                *args,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
             stdout, _ = await proc.communicate()
-            count = int(stdout.decode().strip())
-            return count > 0
-        except (ValueError, Exception):
-            return os.path.exists(session.input_pipe)
+        except Exception:
+            return None
+
+        if proc.returncode != 0:
+            return None
+        return stdout.decode(errors="replace").strip()
 
     async def close_terminal(self, session: TerminalSession) -> bool:
         """Close the terminal window."""
         # Close the Terminal.app window
-        applescript = f'''
-tell application "Terminal"
-    close (every window whose custom title is "{session.name}")
-end tell
-'''
-        try:
-            proc = await asyncio.create_subprocess_exec(
-                "osascript",
-                "-e",
-                applescript,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            await proc.wait()
-        except Exception:
-            pass
+        await self._osa_eval(
+            'tell application "Terminal" to close (every window whose custom title is '
+            + _applescript_string(session.name)
+            + ")"
+        )
 
-        # Clean up temp files
-        try:
-            if session.input_pipe and os.path.exists(session.input_pipe):
-                os.remove(session.input_pipe)
-            if session.output_file and os.path.exists(session.output_file):
-                os.remove(session.output_file)
-            # Also clean up the agent script
-            script_file = session.input_pipe.replace("_input.fifo", "_agent.sh") if session.input_pipe else None
-            if script_file and os.path.exists(script_file):
-                os.remove(script_file)
-        except (OSError, PermissionError):
-            pass
+        writer = getattr(session, "_fifo_writer", None)
+        if writer is not None:
+            writer.close()
+        tail = getattr(session, "_output_tail", None)
+        if tail is not None:
+            tail.close()
+
+        # Clean up temp files (pipe, log and agent script)
+        self._purge_session_files(session.id)
 
         # Remove from sessions
-        if session.id in self._sessions:
-            del self._sessions[session.id]
+        self._sessions.pop(session.id, None)
+        self._alive_cache[1].discard(session.name)
 
         return True
 
+    async def _cleanup_all(self):
+        """Close every session concurrently."""
+        await asyncio.gather(
+            *(self.close_terminal(session) for session in list(self._sessions.values())),
+            return_exceptions=True,
+        )
+
     def cleanup(self):
         """Clean up all sessions and temp files."""
         # Use a new event loop since this may be called from atexit
         # where the main event loop may no longer exist
-        for session in list(self._sessions.values()):
-            try:
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(self.close_terminal(session))
-                loop.close()
-            except Exception:
-                pass
+        try:
+            asyncio.run(self._cleanup_all())
+        except Exception:
+            pass
         # Note: We don't delete the tmp directory itself since it's a fixed location
         # The close_terminal method already cleans up individual session files
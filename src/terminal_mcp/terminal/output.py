@@ -0,0 +1,113 @@
+"""Bounded buffering of terminal output shared by the platform implementations."""
+
+import itertools
+import os
+from collections import deque
+from typing import Optional
+
+# Most recent output lines kept per session
+MAX_RETAINED_LINES = 10000
+
+# Longest run of output without a newline kept before it is cut into a line
+MAX_LINE_BYTES = 64 * 1024
+
+
+class OutputRing:
+    """Bounded buffer of the most recent output lines of a terminal."""
+
+    def __init__(
+        self, max_lines: int = MAX_RETAINED_LINES, max_line_bytes: int = MAX_LINE_BYTES
+    ):
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._partial = bytearray()
+        self._max_line_bytes = max_line_bytes
+
+    def feed(self, data: bytes):
+        """Append raw output, keeping any unterminated line pending."""
+        self._partial += data
+        end = self._partial.rfind(b"\n")
+        if end >= 0:
+            text = self._partial[: end + 1].decode("utf-8", "replace").replace("\r\n", "\n")
+            del self._partial[: end + 1]
+            self._lines.extend(line + "\n" for line in text[:-1].split("\n"))
+
+        # Don't let output without newlines grow the buffer without bound
+        if len(self._partial) > self._max_line_bytes:
+            self._lines.append(self._partial.decode("utf-8", "replace"))
+            self._partial.clear()
+
+    def tail(self, lines: int) -> str:
+        """Return the last lines, including a pending partial line."""
+        if lines <= 0:
+            return ""
+        count = lines - 1 if self._partial else lines
+        tail = list(itertools.islice(reversed(self._lines), count))
+        tail.reverse()
+        return "".join(tail) + self._partial.decode("utf-8", "replace")
+
+    def clear(self):
+        """Drop all buffered output."""
+        self._lines.clear()
+        self._partial.clear()
+
+
+class LogTail:
+    """Follows a growing log file, reading only what was appended.
+
+    The file stays open between reads, so each read costs an fstat plus
+    the reads of new data. It is reopened by path if it was truncated or
+    replaced (unlinked and recreated) since the last read.
+    """
+
+    # Block size for reading newly appended output
+    READ_SIZE = 64 * 1024
+
+    # Keep the descriptor out of child processes; read bytes untranslated
+    # on Windows
+    _OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fd: Optional[int] = None
+        self._offset = 0
+        self._ring = OutputRing()
+
+    def read(self, lines: int) -> str:
+        """Pick up newly appended output and return the last lines.
+
+        Raises:
+            OSError: If the log file can't be accessed.
+        """
+        if self._fd is None:
+            self._fd = os.open(self._path, self._OPEN_FLAGS)
+
+        stat = os.fstat(self._fd)
+        if stat.st_nlink == 0 or stat.st_size < self._offset:
+            # The file was replaced (our copy is unlinked) or truncated;
+            # start over from whatever is at the path now
+            self.close()
+            self._offset = 0
+            self._ring.clear()
+            self._fd = os.open(self._path, self._OPEN_FLAGS)
+            stat = os.fstat(self._fd)
+        size = stat.st_size
+
+        if size > self._offset:
+            os.lseek(self._fd, self._offset, os.SEEK_SET)
+            while self._offset < size:
+                data = os.read(self._fd, min(self.READ_SIZE, size - self._offset))
+                if not data:
+                    break
+                self._offset += len(data)
+                self._ring.feed(data)
+
+        return self._ring.tail(lines)
+
+    def close(self):
+        """Close the log file; Windows can't delete it while it is open."""
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
@@ -1,49 +1,78 @@
 """Windows terminal implementation."""
 
 import asyncio
+import itertools
 import os
+import shutil
+import socket
 import subprocess
-import uuid
 from typing import Optional
 
-from .base import BaseTerminal, TerminalSession
+from .base import PROJECT_ROOT, BaseTerminal, TerminalSession, next_session_id
+from .output import LogTail
+
+# Use tmp folder under the project directory for easier management
+_TMP_DIR = os.path.join(PROJECT_ROOT, "tmp")
+os.makedirs(_TMP_DIR, exist_ok=True)
+
+# Wake-up signals are sent to this machine only
+_COMPUTER_NAME = os.environ.get("COMPUTERNAME") or socket.gethostname()
+
+
+def _write_input_file(path: str, text: str) -> bool:
+    """Hand a command line to the agent as a new input file.
+
+    Runs in a worker thread; open, write, close and rename all happen in
+    that one hop. The line is written under a temporary name and renamed
+    into place, so the agent only ever sees complete files that nothing
+    has open.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(text + "\n")
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
 
 
 class WindowsTerminal(BaseTerminal):
     """Windows terminal implementation supporting Windows Terminal and cmd.exe."""
 
+    # Backoff schedule (seconds) while waiting for an agent to exit on close
+    STOP_POLL_DELAYS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.4, 0.8)
+
     def __init__(self):
-        # Use tmp folder under the project directory for easier management
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        self._temp_dir = os.path.join(project_root, "tmp")
-        os.makedirs(self._temp_dir, exist_ok=True)
+        self._temp_dir = _TMP_DIR
         self._sessions: dict[str, TerminalSession] = {}
         self._use_windows_terminal = self._check_windows_terminal()
 
     def _check_windows_terminal(self) -> bool:
         """Check if Windows Terminal is installed."""
-        try:
-            result = subprocess.run(
-                ["where", "wt.exe"], capture_output=True, text=True, timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+        # Same PATH search as "where", without starting a process
+        return shutil.which("wt.exe") is not None
 
     async def create_terminal(
         self, name: Optional[str] = None, working_dir: Optional[str] = None
     ) -> TerminalSession:
         """Create a new terminal window."""
-        session_id = str(uuid.uuid4())[:8]
+        session_id = next_session_id()
         terminal_name = name or f"Terminal-{session_id}"
 
         # Create communication files
-        input_file = os.path.join(self._temp_dir, f"{session_id}_input.txt")
+        # Commands go to <id>_input_<n>.txt; the session keeps the prefix
+        input_prefix = os.path.join(self._temp_dir, f"{session_id}_input_")
         output_file = os.path.join(self._temp_dir, f"{session_id}_output.log")
         marker_file = os.path.join(self._temp_dir, f"{session_id}_running.marker")
+        stopping_file = os.path.join(self._temp_dir, f"{session_id}_stopping.marker")
+        signal_name = f"TerminalMCP{session_id}"
 
-        # Create empty files
-        open(input_file, "w").close()
+        # Create empty files; input files are created by each send
         open(output_file, "w").close()
         open(marker_file, "w").close()
 
@@ -52,7 +81,13 @@ class WindowsTerminal(BaseTerminal):
         with open(agent_bat, "w") as f:
             f.write(
                 self._create_agent_bat(
-                    input_file, output_file, marker_file, working_dir
+                    self._temp_dir,
+                    f"{session_id}_input_*.txt",
+                    output_file,
+                    marker_file,
+                    stopping_file,
+                    signal_name,
+                    working_dir,
                 )
             )
 
@@ -90,27 +125,43 @@ class WindowsTerminal(BaseTerminal):
             name=terminal_name,
             platform="windows",
             pid=proc.pid,
-            input_pipe=input_file,
+            input_pipe=input_prefix,
             output_file=output_file,
         )
         # Store marker file path in session for cleanup
         session._marker_file = marker_file  # type: ignore
+        session._stopping_file = stopping_file  # type: ignore
         session._agent_bat = agent_bat  # type: ignore
+        session._signal_name = signal_name  # type: ignore
+        session._input_seq = itertools.count(1)  # type: ignore
+        session._output_tail = LogTail(output_file)  # type: ignore
         self._sessions[session_id] = session
         return session
 
     def _create_agent_bat(
         self,
-        input_file: str,
+        input_dir: str,
+        input_pattern: str,
         output_file: str,
         marker_file: str,
+        stopping_file: str,
+        signal_name: str,
         working_dir: Optional[str] = None,
     ) -> str:
-        """Create Windows agent batch script."""
+        """Create Windows agent batch script.
+
+        Between polls the agent blocks in ``waitfor`` on ``signal_name``, so
+        input is picked up as soon as send_input raises that signal; the
+        one-second timeout only bounds the delay if a signal is missed.
+        Each command arrives as its own file matching ``input_pattern`` in
+        ``input_dir``; every poll runs those files in name order and
+        deletes each one after running it. Once
+        ``marker_file`` is gone the agent deletes ``stopping_file`` (the
+        renamed marker) and exits.
+        """
         cd_cmd = f'cd /d "{working_dir}"' if working_dir else ""
 
         return f"""@echo off
-setlocal EnableDelayedExpansion
 {cd_cmd}
 echo Terminal MCP Agent Started (Session ID in filename) >> "{output_file}"
 echo Working directory: %CD% >> "{output_file}"
@@ -119,45 +170,87 @@ echo.
 :loop
     if not exist "{marker_file}" (
         echo Session terminated >> "{output_file}"
+        del "{stopping_file}" > nul 2>&1
         exit /b 0
     )
 
-    set "cmd="
-    for /f "usebackq delims=" %%i in ("{input_file}") do set "cmd=%%i"
-
-    if defined cmd (
-        echo. > "{input_file}"
-        echo ^> !cmd! >> "{output_file}"
-        echo ^> !cmd!
-        cmd /c "!cmd!" >> "{output_file}" 2>&1
-        echo. >> "{output_file}"
+    for /f "delims=" %%f in ('dir /b /on "{input_dir}\\{input_pattern}" 2^>nul') do (
+        for /f "usebackq delims=" %%i in ("{input_dir}\\%%f") do (
+            echo ^> %%i >> "{output_file}"
+            echo ^> %%i
+            cmd /c "%%i" >> "{output_file}" 2>&1
+            echo. >> "{output_file}"
+        )
+        del "{input_dir}\\%%f" > nul 2>&1
     )
 
-    timeout /t 1 /nobreak > nul
+    waitfor /t 1 {signal_name} > nul 2>&1
 goto loop
 """
 
     async def send_input(self, session: TerminalSession, text: str) -> bool:
         """Send input via file."""
-        if not session.input_pipe or not os.path.exists(session.input_pipe):
+        if not session.input_pipe:
             return False
 
-        try:
-            with open(session.input_pipe, "w") as f:
-                f.write(text)
-            return True
-        except (OSError, PermissionError):
+        # One file per command, numbered so the agent runs them in order
+        input_file = f"{session.input_pipe}{next(session._input_seq):08d}.txt"  # type: ignore
+
+        # Keep the file write off the event loop; the project folder may be
+        # on a slow or network drive
+        if not await asyncio.to_thread(_write_input_file, input_file, text):
             return False
 
+        await self._wake_agent(session)
+        return True
+
+    async def _stop_agent(
+        self, session: TerminalSession, marker_file: str, stopping_file: str
+    ):
+        """Tell the agent to exit and wait until it has."""
+        try:
+            os.replace(marker_file, stopping_file)
+        except OSError:
+            # No marker: the agent has already exited
+            return
+
+        await self._wake_agent(session)
+        for delay in self.STOP_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            if not os.path.exists(stopping_file):
+                break
+
+    async def _wake_agent(self, session: TerminalSession):
+        """Signal the agent so it stops waiting and checks for work."""
+        signal_name = getattr(session, "_signal_name", None)
+        if not signal_name:
+            return
+
+        # Without /s, waitfor broadcasts the signal across the domain
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "waitfor",
+                "/s",
+                _COMPUTER_NAME,
+                "/si",
+                signal_name,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await proc.wait()
+        except OSError:
+            # The agent still notices on its next poll
+            pass
+
     async def get_output(self, session: TerminalSession, lines: int = 100) -> str:
         """Read output from file."""
-        if not session.output_file or not os.path.exists(session.output_file):
+        # Only bytes appended since the previous call are read
+        tail = getattr(session, "_output_tail", None)
+        if tail is None:
             return ""
 
         try:
-            with open(session.output_file, "r", encoding="utf-8", errors="replace") as f:
-                all_lines = f.readlines()
-                return "".join(all_lines[-lines:])
+            return tail.read(lines)
         except (FileNotFoundError, PermissionError):
             return ""
 
@@ -170,43 +263,34 @@ goto loop
 
     async def close_terminal(self, session: TerminalSession) -> bool:
         """Close terminal by removing marker file."""
-        # Remove marker file to signal the batch script to exit
+        # Rename the marker file to signal the batch script to exit, then
+        # wait for the script to delete the renamed file on its way out
         marker_file = getattr(session, "_marker_file", None)
-        if marker_file and os.path.exists(marker_file):
-            try:
-                os.remove(marker_file)
-            except OSError:
-                pass
+        stopping_file = getattr(session, "_stopping_file", None)
+        if marker_file and stopping_file:
+            await self._stop_agent(session, marker_file, stopping_file)
 
-        # Wait a bit for the batch script to notice and exit
-        await asyncio.sleep(2)
-
-        # Clean up temp files
-        try:
-            if session.input_pipe and os.path.exists(session.input_pipe):
-                os.remove(session.input_pipe)
-            if session.output_file and os.path.exists(session.output_file):
-                os.remove(session.output_file)
-            agent_bat = getattr(session, "_agent_bat", None)
-            if agent_bat and os.path.exists(agent_bat):
-                os.remove(agent_bat)
-        except (OSError, PermissionError):
-            pass
+        # Clean up temp files; the log has to be closed before Windows
+        # lets it be deleted
+        self._close_output_tail(session)
+        self._purge_session_files(session.id)
 
         # Remove from sessions
-        if session.id in self._sessions:
-            del self._sessions[session.id]
+        self._sessions.pop(session.id, None)
 
         return True
 
+    def _close_output_tail(self, session: TerminalSession):
+        """Release the session's handle on its output log."""
+        tail = getattr(session, "_output_tail", None)
+        if tail is not None:
+            tail.close()
+
     def cleanup(self):
         """Clean up all sessions and temp files."""
-        for session in list(self._sessions.values()):
-            # Synchronous cleanup for atexit
-            marker_file = getattr(session, "_marker_file", None)
-            if marker_file and os.path.exists(marker_file):
-                try:
-                    os.remove(marker_file)
-                except OSError:
-                    pass
+        # Synchronous cleanup for atexit; removing the marker files along
+        # with the rest tells the agents to exit
+        for session in self._sessions.values():
+            self._close_output_tail(session)
+        self._purge_session_files(*self._sessions)
         # Note: We don't delete the tmp directory itself since it's a fixed location